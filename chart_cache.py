@@ -0,0 +1,229 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import matplotlib as mpl
+import pandas as pd
+
+DEFAULT_CACHE_DIR = '.chart_cache'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Bump when chart styling changes so previously rendered images are not served.
+CHART_CACHE_VERSION = 1
+
+# rcParams that never change how a chart looks once rendered.
+_NON_RENDERING_RC_PREFIXES = (
+    'animation.', 'backend', 'interactive', 'keymap.', 'savefig.directory',
+    'toolbar', 'timezone', 'webagg.', 'figure.max_open_warning',
+)
+
+_MISSING = object()
+
+def dataset_fingerprint(data):
+    """Return a hex digest identifying the contents of a DataFrame or Series."""
+    digest = hashlib.sha1()
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr(list(zip(data.columns, map(str, data.dtypes)))).encode())
+    else:
+        digest.update(repr((data.name, str(data.dtype))).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def style_fingerprint():
+    """Return a hex digest of the active matplotlib rcParams that affect rendering.
+
+    Changes made by plt.style.use() or sns.set_theme() change the digest.
+    """
+    params = {key: value for key, value in mpl.rcParams.items()
+              if not key.startswith(_NON_RENDERING_RC_PREFIXES)}
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+def code_fingerprint(func):
+    """Return a hex digest of a function's code, so editing it changes cache keys."""
+    def describe(code):
+        consts = [describe(c) if hasattr(c, 'co_code') else repr(c) for c in code.co_consts]
+        return [code.co_code.hex(), code.co_names, consts]
+    parts = [func.__qualname__, repr(func.__defaults__), describe(func.__code__)]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+def _json_default(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _encode_aggregate(value):
+    """Return the JSON text for an aggregate, which must be a Series or None.
+
+    Raises TypeError for anything that would not round-trip exactly.
+    """
+    if value is None:
+        return json.dumps({'kind': 'none'})
+    if not isinstance(value, pd.Series):
+        raise TypeError(f"cannot cache a {type(value).__name__} aggregate")
+    text = json.dumps({
+        'kind': 'series',
+        'name': value.name,
+        'dtype': str(value.dtype),
+        'index_name': value.index.name,
+        'index_dtype': str(value.index.dtype),
+        'index': value.index.tolist(),
+        'values': value.tolist(),
+    }, default=_json_default)
+    decoded = _decode_aggregate(json.loads(text))
+    if not (decoded.equals(value) and decoded.index.equals(value.index)
+            and decoded.dtype == value.dtype and decoded.index.dtype == value.index.dtype
+            and decoded.name == value.name and decoded.index.name == value.index.name):
+        raise TypeError("aggregate does not round-trip through JSON")
+    return text
+
+def _decode_aggregate(data):
+    if data['kind'] == 'none':
+        return None
+    index = pd.Index(data['index'], dtype=data['index_dtype'], name=data['index_name'])
+    return pd.Series(data['values'], index=index, name=data['name'], dtype=data['dtype'])
+
+class ChartCache:
+    """Size-bounded on-disk cache of rendered chart PNGs and their inputs.
+
+    Entries are keyed by make_key() and evicted least recently used first
+    once the directory grows past max_bytes. Aggregates are stored as JSON
+    and must be a pandas Series or None.
+
+    Writes are best effort: a failed write (read-only directory, full disk)
+    leaves the entry uncached instead of raising.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None  # bytes on disk, measured on the first write
+        os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, version, chart, filters=None, width=None, height=None, dpi=None, style=None):
+        """Build a cache key from the dataset version, chart type and parameters.
+
+        Keys for rendered images should pass style=style_fingerprint().
+        """
+        parts = {
+            'cache_version': CHART_CACHE_VERSION,
+            'version': version,
+            'chart': chart,
+            'filters': filters or {},
+            'size': [width, height, dpi],
+            'style': style,
+        }
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_image(self, key):
+        """Return cached PNG bytes for key, or None."""
+        return self._read(key + '.png')
+
+    def put_image(self, key, png):
+        """Store PNG bytes under key. Returns False if the write failed."""
+        return self._write(key + '.png', png)
+
+    def get_data(self, key, default=None):
+        """Return the cached aggregate for key, or default."""
+        data = self._read(key + '.json')
+        if data is None:
+            return default
+        try:
+            return _decode_aggregate(json.loads(data))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return default
+
+    def put_data(self, key, value):
+        """Store an aggregate under key. Returns False if the write failed.
+
+        Raises TypeError if value is not a Series or None that survives a
+        JSON round trip.
+        """
+        return self._write(key + '.json', _encode_aggregate(value).encode())
+
+    def aggregate(self, key, compute):
+        """Return the cached aggregate for key, computing and storing it on a miss."""
+        value = self.get_data(key, default=_MISSING)
+        if value is _MISSING:
+            value = compute()
+            try:
+                self.put_data(key, value)
+            except TypeError:
+                pass  # not cacheable, served uncached
+        return value
+
+    def clear(self):
+        """Remove every cached entry."""
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        path = self._path(name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def _write(self, name, data):
+        path = self._path(name)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        if self._size is None:
+            self._size = self._scan()[1]
+        else:
+            self._size += len(data) - old_size
+        if self._size > self.max_bytes:
+            self._evict()
+        return True
+
+    def _scan(self):
+        """Return ([(mtime, size, path), ...], total size) for the cache directory."""
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict(self):
+        entries, total = self._scan()
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
@@ -1,7 +1,9 @@
+import io
 import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from PyQt5.QtWidgets import (
@@ -9,30 +11,124 @@ from PyQt5.QtWidgets import (
     QPushButton, QLabel, QFrame, QSizePolicy, QScrollArea, 
     QTabWidget, QComboBox, QGridLayout, QStackedWidget
 )
-from PyQt5.QtGui import QIcon, QFont, QColor, QPalette
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QPainter, QPixmap
+from PyQt5.QtCore import Qt, QSize, QTimer
+
+from chart_cache import ChartCache, dataset_fingerprint, style_fingerprint
+from ev_analysis import clean_data
+
+def create_chart_figure(width, height, dpi):
+    """Return a (figure, axes) pair with the dashboard chart styling."""
+    fig = Figure(figsize=(width, height), dpi=dpi, facecolor='#2a2a40')
+    axes = fig.add_subplot(111)
+    axes.set_facecolor('#2a2a40')
+    
+    # Style the chart
+    fig.patch.set_facecolor('#2a2a40')
+    axes.spines['bottom'].set_color('#ffffff')
+    axes.spines['top'].set_color('#2a2a40') 
+    axes.spines['right'].set_color('#2a2a40')
+    axes.spines['left'].set_color('#ffffff')
+    axes.tick_params(axis='x', colors='#ffffff')
+    axes.tick_params(axis='y', colors='#ffffff')
+    axes.yaxis.label.set_color('#ffffff')
+    axes.xaxis.label.set_color('#ffffff')
+    axes.title.set_color('#ffffff')
+    return fig, axes
+
 
 class MplCanvas(FigureCanvas):
     def __init__(self, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi, facecolor='#2a2a40')
-        self.axes = self.fig.add_subplot(111)
-        self.axes.set_facecolor('#2a2a40')
-        
-        # Style the chart
-        self.fig.patch.set_facecolor('#2a2a40')
-        self.axes.spines['bottom'].set_color('#ffffff')
-        self.axes.spines['top'].set_color('#2a2a40') 
-        self.axes.spines['right'].set_color('#2a2a40')
-        self.axes.spines['left'].set_color('#ffffff')
-        self.axes.tick_params(axis='x', colors='#ffffff')
-        self.axes.tick_params(axis='y', colors='#ffffff')
-        self.axes.yaxis.label.set_color('#ffffff')
-        self.axes.xaxis.label.set_color('#ffffff')
-        self.axes.title.set_color('#ffffff')
-        
+        self.fig, self.axes = create_chart_figure(width, height, dpi)
         super(MplCanvas, self).__init__(self.fig)
 
 
+class OffscreenCanvas(FigureCanvasAgg):
+    """Agg counterpart of MplCanvas, for rendering charts to PNG."""
+    def __init__(self, width=5, height=4, dpi=100):
+        self.fig, self.axes = create_chart_figure(width, height, dpi)
+        super().__init__(self.fig)
+
+    def to_png(self):
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format='png', dpi=self.fig.dpi, facecolor=self.fig.get_facecolor())
+        return buf.getvalue()
+
+
+class CachedChart(QWidget):
+    """Chart widget that serves renders from a ChartCache at its device pixel size.
+
+    The cache key covers the widget size, DPI and device pixel ratio. A size
+    that is not cached yet is drawn offscreen with the MplCanvas styling and
+    stored once resizing settles, so later launches skip drawing entirely.
+    """
+    def __init__(self, cache, version, chart, filters, compute, draw, width=5, height=4, dpi=100,
+                 parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.key_parts = (version, chart, filters)
+        self.style = style_fingerprint()
+        self.compute = compute
+        self.draw = draw
+        self.data = None
+        self.data_ready = False
+        self.dpi = dpi
+        self.default_size = QSize(int(width * dpi), int(height * dpi))
+        self.pixmap = None
+        self.pixmap_size = None
+        self.pending = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        
+        # Store new renders only after resizing has settled
+        self.store_timer = QTimer(self)
+        self.store_timer.setSingleShot(True)
+        self.store_timer.setInterval(300)
+        self.store_timer.timeout.connect(self.store)
+
+    def sizeHint(self):
+        return self.default_size
+
+    def minimumSizeHint(self):
+        return QSize(10, 10)
+
+    def paintEvent(self, event):
+        size = (self.width(), self.height(), self.devicePixelRatioF())
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        if size != self.pixmap_size:
+            self.pixmap = self.load(*size)
+            self.pixmap_size = size
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.pixmap)
+        painter.end()
+
+    def load(self, width, height, ratio):
+        key = self.cache.make_key(*self.key_parts, width=width, height=height,
+                                  dpi=self.dpi * ratio, style=self.style)
+        pixmap = QPixmap()
+        png = self.cache.get_image(key)
+        if png is None or not pixmap.loadFromData(png, 'PNG'):
+            png = self.render(width, height, ratio)
+            pixmap.loadFromData(png, 'PNG')
+            self.pending = (key, png)
+            self.store_timer.start()
+        pixmap.setDevicePixelRatio(ratio)
+        return pixmap
+
+    def render(self, width, height, ratio):
+        if not self.data_ready:
+            self.data = self.compute()
+            self.data_ready = True
+        canvas = OffscreenCanvas(width / self.dpi, height / self.dpi, self.dpi * ratio)
+        self.draw(canvas, self.data)
+        return canvas.to_png()
+
+    def store(self):
+        if self.pending is not None:
+            self.cache.put_image(*self.pending)
+            self.pending = None
+
+
 class InsightCard(QFrame):
     def __init__(self, title, parent=None):
         super().__init__(parent)
@@ -60,31 +156,29 @@ class InsightCard(QFrame):
         self.content_layout = QVBoxLayout(self.content_widget)
         self.layout.addWidget(self.content_widget)
 
+    def add_chart(self, df, chart, aggregate, draw, filters=None, cache=None, version=None,
+                  width=5, height=4, dpi=100):
+        """Add a chart to the card, served from the chart cache when one is given.
+
+        aggregate(df) computes the chart input and draw(canvas, data) renders it.
+        Without a cache and dataset version the chart is a live MplCanvas.
+        """
+        if cache is None or version is None:
+            self.canvas = MplCanvas(width=width, height=height, dpi=dpi)
+            draw(self.canvas, aggregate(df))
+        else:
+            self.canvas = CachedChart(cache, version, chart, filters, lambda: aggregate(df), draw,
+                                      width=width, height=height, dpi=dpi)
+        self.content_layout.addWidget(self.canvas)
+
 
 class ManufacturersCard(InsightCard):
-    def __init__(self, df, parent=None):
+    def __init__(self, df, parent=None, cache=None, version=None):
         super().__init__("Most Popular EV Manufacturers", parent)
         
         # Create chart
-        self.canvas = MplCanvas(width=5, height=4, dpi=100)
-        top_manufacturers = df['Make'].value_counts().head(10)
-        
-        # Create bars with gradient colors
-        colors = plt.cm.viridis(np.linspace(0.2, 0.8, len(top_manufacturers)))
-        bars = self.canvas.axes.bar(top_manufacturers.index, top_manufacturers.values, color=colors)
-        
-        # Style chart
-        self.canvas.axes.set_ylabel('Number of Vehicles')
-        self.canvas.axes.set_title('Top 10 EV Manufacturers')
-        plt.setp(self.canvas.axes.xaxis.get_majorticklabels(), rotation=45, ha='right')
-        
-        # Add value labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            self.canvas.axes.text(bar.get_x() + bar.get_width()/2., height + 5,
-                    f'{int(height)}', ha='center', va='bottom', color='white')
-                    
-        self.canvas.fig.tight_layout()
+        self.add_chart(df, 'manufacturers', self.aggregate, self.draw_chart, filters={'top_n': 10},
+                       cache=cache, version=version)
         
         # Add insight text
         insight_text = """
@@ -98,31 +192,38 @@ class ManufacturersCard(InsightCard):
         self.insight_label.setStyleSheet("color: #ffffff; background-color: #202030; padding: 10px; border-radius: 5px;")
         
         # Add to layout
-        self.content_layout.addWidget(self.canvas)
         self.content_layout.addWidget(self.insight_label)
 
+    @staticmethod
+    def aggregate(df):
+        return df['Make'].value_counts().head(10)
+
+    def draw_chart(self, canvas, top_manufacturers):
+        # Create bars with gradient colors
+        colors = plt.cm.viridis(np.linspace(0.2, 0.8, len(top_manufacturers)))
+        bars = canvas.axes.bar(top_manufacturers.index, top_manufacturers.values, color=colors)
+        
+        # Style chart
+        canvas.axes.set_ylabel('Number of Vehicles')
+        canvas.axes.set_title('Top 10 EV Manufacturers')
+        plt.setp(canvas.axes.xaxis.get_majorticklabels(), rotation=45, ha='right')
+        
+        # Add value labels on top of bars
+        for bar in bars:
+            height = bar.get_height()
+            canvas.axes.text(bar.get_x() + bar.get_width()/2., height + 5,
+                    f'{int(height)}', ha='center', va='bottom', color='white')
+                    
+        canvas.fig.tight_layout()
+
 
 class RegistrationsByYearCard(InsightCard):
-    def __init__(self, df, parent=None):
+    def __init__(self, df, parent=None, cache=None, version=None):
         super().__init__("Number of EVs Registered Each Year", parent)
         
         # Create chart
-        self.canvas = MplCanvas(width=5, height=4, dpi=100)
-        ev_count_by_year = df['Model Year'].value_counts().sort_index()
-        
-        # Create line chart
-        self.canvas.axes.plot(ev_count_by_year.index, ev_count_by_year.values, 
-                             marker='o', linestyle='-', linewidth=2, color='#00aaff')
-        
-        # Fill area under the line
-        self.canvas.axes.fill_between(ev_count_by_year.index, ev_count_by_year.values, 
-                                     alpha=0.3, color='#00aaff')
-        
-        # Style chart
-        self.canvas.axes.set_xlabel('Year')
-        self.canvas.axes.set_ylabel('Number of Registrations')
-        self.canvas.axes.set_title('EV Registrations by Year')
-        self.canvas.fig.tight_layout()
+        self.add_chart(df, 'registrations_by_year', self.aggregate, self.draw_chart,
+                       cache=cache, version=version)
         
         # Add insight text
         insight_text = """
@@ -136,29 +237,35 @@ class RegistrationsByYearCard(InsightCard):
         self.insight_label.setStyleSheet("color: #ffffff; background-color: #202030; padding: 10px; border-radius: 5px;")
         
         # Add to layout
-        self.content_layout.addWidget(self.canvas)
         self.content_layout.addWidget(self.insight_label)
 
+    @staticmethod
+    def aggregate(df):
+        return df['Model Year'].value_counts().sort_index()
+
+    def draw_chart(self, canvas, ev_count_by_year):
+        # Create line chart
+        canvas.axes.plot(ev_count_by_year.index, ev_count_by_year.values, 
+                        marker='o', linestyle='-', linewidth=2, color='#00aaff')
+        
+        # Fill area under the line
+        canvas.axes.fill_between(ev_count_by_year.index, ev_count_by_year.values, 
+                                alpha=0.3, color='#00aaff')
+        
+        # Style chart
+        canvas.axes.set_xlabel('Year')
+        canvas.axes.set_ylabel('Number of Registrations')
+        canvas.axes.set_title('EV Registrations by Year')
+        canvas.fig.tight_layout()
+
 
 class EVTypeDistributionCard(InsightCard):
-    def __init__(self, df, parent=None):
+    def __init__(self, df, parent=None, cache=None, version=None):
         super().__init__("Distribution of EV Types (BEV vs PHEV)", parent)
         
         # Create chart
-        self.canvas = MplCanvas(width=5, height=4, dpi=100)
-        ev_types = df['Electric Vehicle Type'].value_counts()
-        
-        # Create pie chart with custom colors
-        colors = ['#8844ee', '#ff6644']
-        explode = (0.1, 0)  # explode the 1st slice (BEV)
-        
-        self.canvas.axes.pie(ev_types.values, explode=explode, labels=ev_types.index, 
-                            autopct='%1.1f%%', startangle=90, colors=colors, 
-                            wedgeprops={'edgecolor': '#2a2a40'})
-        
-        self.canvas.axes.set_title('EV Type Distribution')
-        self.canvas.axes.axis('equal')  # Equal aspect ratio ensures pie is circular
-        self.canvas.fig.tight_layout()
+        self.add_chart(df, 'ev_type_distribution', self.aggregate, self.draw_chart,
+                       cache=cache, version=version)
         
         # Add insight text
         insight_text = """
@@ -172,33 +279,33 @@ class EVTypeDistributionCard(InsightCard):
         self.insight_label.setStyleSheet("color: #ffffff; background-color: #202030; padding: 10px; border-radius: 5px;")
         
         # Add to layout
-        self.content_layout.addWidget(self.canvas)
         self.content_layout.addWidget(self.insight_label)
 
+    @staticmethod
+    def aggregate(df):
+        return df['Electric Vehicle Type'].value_counts()
+
+    def draw_chart(self, canvas, ev_types):
+        # Create pie chart with custom colors
+        colors = ['#8844ee', '#ff6644']
+        explode = (0.1, 0)  # explode the 1st slice (BEV)
+        
+        canvas.axes.pie(ev_types.values, explode=explode, labels=ev_types.index, 
+                       autopct='%1.1f%%', startangle=90, colors=colors, 
+                       wedgeprops={'edgecolor': '#2a2a40'})
+        
+        canvas.axes.set_title('EV Type Distribution')
+        canvas.axes.axis('equal')  # Equal aspect ratio ensures pie is circular
+        canvas.fig.tight_layout()
+
 
 class CountiesCard(InsightCard):
-    def __init__(self, df, parent=None):
+    def __init__(self, df, parent=None, cache=None, version=None):
         super().__init__("Top Counties with the Most EVs", parent)
         
         # Create chart
-        self.canvas = MplCanvas(width=5, height=4, dpi=100)
-        top_counties = df['County'].value_counts().head(10)
-        
-        # Create horizontal bar chart with gradient
-        colors = plt.cm.cool(np.linspace(0.2, 0.8, len(top_counties)))
-        bars = self.canvas.axes.barh(top_counties.index[::-1], top_counties.values[::-1], color=colors[::-1])
-        
-        # Style chart
-        self.canvas.axes.set_xlabel('Number of EVs')
-        self.canvas.axes.set_title('Top 10 Counties by EV Registration')
-        
-        # Add value labels
-        for bar in bars:
-            width = bar.get_width()
-            self.canvas.axes.text(width + 5, bar.get_y() + bar.get_height()/2,
-                    f'{int(width)}', ha='left', va='center', color='white')
-        
-        self.canvas.fig.tight_layout()
+        self.add_chart(df, 'counties', self.aggregate, self.draw_chart, filters={'top_n': 10},
+                       cache=cache, version=version)
         
         # Add insight text
         insight_text = """
@@ -212,50 +319,37 @@ class CountiesCard(InsightCard):
         self.insight_label.setStyleSheet("color: #ffffff; background-color: #202030; padding: 10px; border-radius: 5px;")
         
         # Add to layout
-        self.content_layout.addWidget(self.canvas)
         self.content_layout.addWidget(self.insight_label)
 
+    @staticmethod
+    def aggregate(df):
+        return df['County'].value_counts().head(10)
+
+    def draw_chart(self, canvas, top_counties):
+        # Create horizontal bar chart with gradient
+        colors = plt.cm.cool(np.linspace(0.2, 0.8, len(top_counties)))
+        bars = canvas.axes.barh(top_counties.index[::-1], top_counties.values[::-1], color=colors[::-1])
+        
+        # Style chart
+        canvas.axes.set_xlabel('Number of EVs')
+        canvas.axes.set_title('Top 10 Counties by EV Registration')
+        
+        # Add value labels
+        for bar in bars:
+            width = bar.get_width()
+            canvas.axes.text(width + 5, bar.get_y() + bar.get_height()/2,
+                    f'{int(width)}', ha='left', va='center', color='white')
+        
+        canvas.fig.tight_layout()
+
 
 class RangeByYearCard(InsightCard):
-    def __init__(self, df, parent=None):
+    def __init__(self, df, parent=None, cache=None, version=None):
         super().__init__("Correlation Between Electric Range and Model Year", parent)
         
         # Create chart
-        self.canvas = MplCanvas(width=5, height=4, dpi=100)
-        
-        # Check if Electric Range column exists
-        if 'Electric Range' in df.columns:
-            # Group by year and calculate average range
-            range_by_year = df.groupby('Model Year')['Electric Range'].mean()
-            
-            # Create scatter plot with trend line
-            self.canvas.axes.scatter(range_by_year.index, range_by_year.values, 
-                                    color='#ff5588', s=50, alpha=0.7)
-            
-            # Add trend line
-            z = np.polyfit(range_by_year.index, range_by_year.values, 1)
-            p = np.poly1d(z)
-            self.canvas.axes.plot(range_by_year.index, p(range_by_year.index), 
-                                 linestyle='--', color='#ffffff', alpha=0.8)
-            
-            # Style chart
-            self.canvas.axes.set_xlabel('Model Year')
-            self.canvas.axes.set_ylabel('Average Electric Range (miles)')
-            self.canvas.axes.set_title('Electric Range by Model Year')
-            
-            # Add annotation showing the trend
-            x_pos = range_by_year.index.max() - 2
-            y_pos = p(x_pos) + 10
-            self.canvas.axes.annotate(f'Trend: {z[0]:.2f} miles/year', 
-                                     xy=(x_pos, p(x_pos)),
-                                     xytext=(x_pos, y_pos),
-                                     color='white',
-                                     arrowprops=dict(facecolor='white', shrink=0.05, alpha=0.7))
-            
-            self.canvas.fig.tight_layout()
-        else:
-            self.canvas.axes.text(0.5, 0.5, "Electric Range data not available", 
-                                 ha='center', va='center', color='white', fontsize=12)
+        self.add_chart(df, 'range_by_year', self.aggregate, self.draw_chart,
+                       cache=cache, version=version)
         
         # Add insight text
         insight_text = """
@@ -268,9 +362,47 @@ class RangeByYearCard(InsightCard):
         self.insight_label.setStyleSheet("color: #ffffff; background-color: #202030; padding: 10px; border-radius: 5px;")
         
         # Add to layout
-        self.content_layout.addWidget(self.canvas)
         self.content_layout.addWidget(self.insight_label)
 
+    @staticmethod
+    def aggregate(df):
+        if 'Electric Range' not in df.columns:
+            return None
+        return df.groupby('Model Year')['Electric Range'].mean()
+
+    def draw_chart(self, canvas, range_by_year):
+        # Electric Range column is missing from the data
+        if range_by_year is None:
+            canvas.axes.text(0.5, 0.5, "Electric Range data not available", 
+                        ha='center', va='center', color='white', fontsize=12)
+            return
+        
+        # Create scatter plot with trend line
+        canvas.axes.scatter(range_by_year.index, range_by_year.values, 
+                           color='#ff5588', s=50, alpha=0.7)
+        
+        # Add trend line
+        z = np.polyfit(range_by_year.index, range_by_year.values, 1)
+        p = np.poly1d(z)
+        canvas.axes.plot(range_by_year.index, p(range_by_year.index), 
+                        linestyle='--', color='#ffffff', alpha=0.8)
+        
+        # Style chart
+        canvas.axes.set_xlabel('Model Year')
+        canvas.axes.set_ylabel('Average Electric Range (miles)')
+        canvas.axes.set_title('Electric Range by Model Year')
+        
+        # Add annotation showing the trend
+        x_pos = range_by_year.index.max() - 2
+        y_pos = p(x_pos) + 10
+        canvas.axes.annotate(f'Trend: {z[0]:.2f} miles/year', 
+                            xy=(x_pos, p(x_pos)),
+                            xytext=(x_pos, y_pos),
+                            color='white',
+                            arrowprops=dict(facecolor='white', shrink=0.05, alpha=0.7))
+        
+        canvas.fig.tight_layout()
+
 
 class SummaryCard(InsightCard):
     def __init__(self, df, parent=None):
@@ -343,13 +475,22 @@ class Dashboard(QMainWindow):
         
         # Load data
         try:
-            self.df = pd.read_csv('ev_population.csv')
-            self.df.dropna(subset=['Make', 'Model', 'Model Year', 'Electric Vehicle Type'], inplace=True)
-            self.df['Model Year'] = self.df['Model Year'].astype(int)
-            self.df.columns = self.df.columns.str.strip()
+            self.df, self.quarantine, self.quality_report = clean_data(pd.read_csv('ev_population.csv'))
+            print(f"Data quality report ({len(self.df):,} rows kept, {len(self.quarantine):,} quarantined):")
+            print(self.quality_report.to_string(index=False))
         except Exception as e:
             print(f"Error loading data: {e}")
             self.df = pd.DataFrame()  # Empty DataFrame as fallback
+            self.quarantine = pd.DataFrame()
+            self.quality_report = pd.DataFrame()
+        
+        # Rendered charts are reused across runs until the data changes
+        try:
+            self.chart_cache = ChartCache()
+        except OSError as e:
+            print(f"Chart cache disabled: {e}")
+            self.chart_cache = None
+        self.data_version = dataset_fingerprint(self.df) if self.chart_cache is not None else None
         
         # Set up central widget
         self.central_widget = QWidget()
@@ -556,11 +697,11 @@ class Dashboard(QMainWindow):
         grid_layout.setSpacing(20)
         
         # Add cards to grid
-        grid_layout.addWidget(ManufacturersCard(self.df), 0, 0)
-        grid_layout.addWidget(RegistrationsByYearCard(self.df), 0, 1)
-        grid_layout.addWidget(EVTypeDistributionCard(self.df), 1, 0)
-        grid_layout.addWidget(CountiesCard(self.df), 1, 1)
-        grid_layout.addWidget(RangeByYearCard(self.df), 2, 0, 1, 2)
+        grid_layout.addWidget(ManufacturersCard(self.df, cache=self.chart_cache, version=self.data_version), 0, 0)
+        grid_layout.addWidget(RegistrationsByYearCard(self.df, cache=self.chart_cache, version=self.data_version), 0, 1)
+        grid_layout.addWidget(EVTypeDistributionCard(self.df, cache=self.chart_cache, version=self.data_version), 1, 0)
+        grid_layout.addWidget(CountiesCard(self.df, cache=self.chart_cache, version=self.data_version), 1, 1)
+        grid_layout.addWidget(RangeByYearCard(self.df, cache=self.chart_cache, version=self.data_version), 2, 0, 1, 2)
         
         # Add grid to scroll layout
         scroll_layout.addLayout(grid_layout)
@@ -614,7 +755,7 @@ class Dashboard(QMainWindow):
         ]):
             tab = QWidget()
             tab_layout = QVBoxLayout(tab)
-            tab_layout.addWidget(widget_class(self.df))
+            tab_layout.addWidget(widget_class(self.df, cache=self.chart_cache, version=self.data_version))
             tab_widget.addTab(tab, title)
         
         # Add tab widget to charts layout
@@ -1,15 +1,137 @@
 
+import io
+import time
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from chart_cache import code_fingerprint, dataset_fingerprint, style_fingerprint
+
+REQUIRED_COLUMNS = ['Make', 'Model', 'Model Year', 'Electric Vehicle Type']
+MIN_MODEL_YEAR = 1990
+MIN_POSTAL_CODE, MAX_POSTAL_CODE = 98001, 99403  # Washington ZIP codes
+ZIP_PATTERN = r'^(\d{5})(?:-\d{4})?$'
+POINT_PATTERN = r'^\s*POINT \((-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?)\)\s*$'
+
+def _check_required_fields(df, keep):
+    """Rows missing any of the key columns."""
+    return df[REQUIRED_COLUMNS].isna().any(axis=1).to_numpy()
+
+def _check_model_year(df, keep):
+    """Rows whose model year is not a whole number in the plausible range."""
+    year = pd.to_numeric(df['Model Year'], errors='coerce')
+    df['Model Year'] = year
+    max_year = pd.Timestamp.now().year + 1
+    return (~year.between(MIN_MODEL_YEAR, max_year) | year.mod(1).ne(0)).to_numpy()
+
+def _check_non_negative(column):
+    """Build a fix that blanks out negative or non-numeric values of a column."""
+    def check(df, keep):
+        if column not in df.columns:
+            return None
+        value = pd.to_numeric(df[column], errors='coerce')
+        bad = (value < 0) | (df[column].notna() & value.isna())
+        df[column] = value.mask(bad)
+        return bad.to_numpy()
+    return check
+
+def _check_state(df, keep):
+    """Rows not registered in Washington."""
+    if 'State' not in df.columns:
+        return None
+    valid = df['State'].astype(str).str.strip().str.upper().eq('WA')
+    df.loc[valid, 'State'] = 'WA'
+    return ~valid.to_numpy()
+
+def _check_postal_code(df, keep):
+    """Blank out postal codes that are not Washington ZIP or ZIP+4 codes."""
+    if 'Postal Code' not in df.columns:
+        return None
+    if pd.api.types.is_numeric_dtype(df['Postal Code']):
+        code = df['Postal Code'].where(df['Postal Code'].mod(1).eq(0))
+    else:
+        text = df['Postal Code'].astype(str).str.strip()
+        code = pd.to_numeric(text.str.extract(ZIP_PATTERN)[0], errors='coerce')
+    valid = code.between(MIN_POSTAL_CODE, MAX_POSTAL_CODE)
+    bad = df['Postal Code'].notna() & ~valid
+    df['Postal Code'] = code.where(valid).astype('Int64')
+    return bad.to_numpy()
+
+def _check_vehicle_location(df, keep):
+    """Blank out malformed 'POINT (lon lat)' values and split out coordinates."""
+    if 'Vehicle Location' not in df.columns:
+        return None
+    coords = df['Vehicle Location'].astype(str).str.extract(POINT_PATTERN).astype(float)
+    lon, lat = coords[0], coords[1]
+    valid = lon.between(-180, 180) & lat.between(-90, 90)
+    bad = df['Vehicle Location'].notna() & ~valid
+    df['Vehicle Location'] = df['Vehicle Location'].where(valid)
+    df['Longitude'] = lon.where(valid)
+    df['Latitude'] = lat.where(valid)
+    return bad.to_numpy()
+
+def _check_duplicate_ids(df, keep):
+    """Rows repeating a DOL Vehicle ID already seen among the kept rows."""
+    if 'DOL Vehicle ID' not in df.columns:
+        return None
+    ids = df['DOL Vehicle ID'][keep]
+    bad = np.zeros(len(df), dtype=bool)
+    bad[keep] = (ids.notna() & ids.duplicated(keep='first')).to_numpy()
+    return bad
+
+# (name, action, check) in the order they run. A check returns a boolean
+# array of affected rows, or None when its column is not in the data.
+# 'fix' checks repair the rows in place, 'quarantine' checks drop them;
+# quarantined rows are reported with their original values.
+CLEANING_CHECKS = [
+    ('required_fields', 'quarantine', _check_required_fields),
+    ('model_year_range', 'quarantine', _check_model_year),
+    ('electric_range_non_negative', 'fix', _check_non_negative('Electric Range')),
+    ('base_msrp_non_negative', 'fix', _check_non_negative('Base MSRP')),
+    ('state_is_wa', 'quarantine', _check_state),
+    ('postal_code_valid', 'fix', _check_postal_code),
+    ('vehicle_location_point', 'fix', _check_vehicle_location),
+    ('duplicate_dol_vehicle_id', 'quarantine', _check_duplicate_ids),
+]
+
+def clean_data(df):
+    """Validate and clean a raw EV DataFrame.
+
+    Returns a (clean, quarantine, report) tuple: the cleaned rows, the
+    dropped rows with a 'Quarantine Reason' column, and a data-quality
+    report with the rows affected and time taken by each check.
+    """
+    columns = df.columns.str.strip()
+    raw = df
+    df = df.copy()
+    df.columns = columns
+    keep = np.ones(len(df), dtype=bool)
+    reason = np.full(len(df), None, dtype=object)
+    report = []
+    for name, action, check in CLEANING_CHECKS:
+        start = time.perf_counter()
+        bad = check(df, keep)
+        elapsed = time.perf_counter() - start
+        if bad is None:
+            report.append((name, action, 'skipped', 0, elapsed))
+            continue
+        bad = bad & keep
+        if action == 'quarantine':
+            reason[bad] = name
+            keep &= ~bad
+        report.append((name, action, 'ok', int(bad.sum()), elapsed))
+
+    # Quarantined rows come from the caller's frame so they keep their raw values
+    quarantine = raw[~keep].set_axis(columns, axis=1).assign(**{'Quarantine Reason': reason[~keep]})
+    clean = df[keep].astype({'Model Year': int})
+    report = pd.DataFrame(report, columns=['check', 'action', 'status', 'rows', 'seconds'])
+    return clean, quarantine, report
+
 def load_data(path='ev_population.csv'):
     """Load and clean the EV dataset."""
-    df = pd.read_csv(path)
-    df.dropna(subset=['Make', 'Model', 'Model Year', 'Electric Vehicle Type'], inplace=True)
-    df['Model Year'] = df['Model Year'].astype(int)
-    df.columns = df.columns.str.strip()
-    return df
+    clean, quarantine, report = clean_data(pd.read_csv(path))
+    return clean
 
 def get_top_manufacturers(df, top_n=10):
     """Return a Series of top EV manufacturers."""
@@ -33,6 +155,19 @@ def get_range_by_year(df):
         return df.groupby('Model Year')['Electric Range'].mean()
     return pd.Series(dtype='float64')
 
+def cached_aggregate(cache, df, func, version=None, **kwargs):
+    """Return func(df, **kwargs), served from a ChartCache when nothing changed.
+
+    Pass version=dataset_fingerprint(df) when making several calls on the
+    same DataFrame so it is only hashed once.
+    """
+    if cache is None:
+        return func(df, **kwargs)
+    if version is None:
+        version = dataset_fingerprint(df)
+    key = cache.make_key(version, func.__name__, kwargs)
+    return cache.aggregate(key, lambda: func(df, **kwargs))
+
 def plot_series(series, title, xlabel, ylabel, kind='bar', color='skyblue'):
     """Generic function to plot a pandas Series."""
     plt.figure(figsize=(10, 6))
@@ -45,3 +180,34 @@ def plot_series(series, title, xlabel, ylabel, kind='bar', color='skyblue'):
     plt.ylabel(ylabel)
     plt.tight_layout()
     return plt.gcf()
+
+def render_chart(draw, data, cache=None, **params):
+    """Render draw(data, **params) to PNG bytes, served from a ChartCache when unchanged.
+
+    draw plots with pyplot onto a new current figure, as the notebook cells
+    do. Returns an image rather than a Figure, for display-only use such as
+    IPython.display.Image. The cache key covers the data, the code of draw,
+    params and the active matplotlib style.
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(dataset_fingerprint(data), code_fingerprint(draw), params,
+                             style=style_fingerprint())
+        png = cache.get_image(key)
+        if png is not None:
+            return png
+
+    draw(data, **params)
+    fig = plt.gcf()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    plt.close(fig)
+    png = buf.getvalue()
+    if key is not None:
+        cache.put_image(key, png)
+    return png
+
+def render_series(series, title, xlabel, ylabel, kind='bar', color='skyblue', cache=None):
+    """Render plot_series to PNG bytes, served from a ChartCache when unchanged."""
+    return render_chart(plot_series, series, cache=cache, title=title, xlabel=xlabel,
+                        ylabel=ylabel, kind=kind, color=color)